@@ -11,12 +11,16 @@ excel_file = 'your_file.xlsx'  # Replace with your Excel filename
 # Step 2: Specify your sheet names (adjust if different)
 sheet_names = ['Batch1', 'Batch2', 'Batch3']  # Change to your actual sheet names
 
-# Step 3: Read and combine all sheets
+# Optional: much faster Excel parsing with less memory
+# Run `!pip install python-calamine` first, then set engine = 'calamine'
+engine = None  # None = pandas picks by extension (openpyxl for .xlsx, xlrd for .xls)
+
+# Step 3: Read and combine all sheets (one read_excel call opens the file once)
+print(f"Loading {sheet_names}...")
+sheets = pd.read_excel(excel_file, sheet_name=sheet_names, engine=engine)
 all_data = []
 
-for sheet in sheet_names:
-    print(f"Loading {sheet}...")
-    df = pd.read_excel(excel_file, sheet_name=sheet)
+for sheet, df in sheets.items():
     df['source_batch'] = sheet  # Add column to track which batch
     all_data.append(df)
     print(f"  ✓ {sheet}: {len(df)} rows, {len(df.columns)} columns")
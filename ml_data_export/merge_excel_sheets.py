@@ -6,7 +6,21 @@ Use this script in your Colab notebook to combine 3 batch sheets from Excel
 import pandas as pd
 import numpy as np
 
-def merge_excel_sheets(excel_file_path, sheet_names=None, output_file='merged_data.csv'):
+def get_excel_engine():
+    """
+    Use the Rust-based calamine reader when installed (faster, far less memory than openpyxl)
+    
+    Returns None otherwise so pandas picks the engine from the file extension
+    (openpyxl for .xlsx, xlrd for legacy .xls).
+    """
+    try:
+        import python_calamine  # noqa: F401
+        return 'calamine'
+    except ImportError:
+        return None
+
+def merge_excel_sheets(excel_file_path, sheet_names=None, output_file='merged_data.csv', verbose=False,
+                       usecols=None, dtype=None):
     """
     Merge multiple Excel sheets into a single DataFrame
     
@@ -15,24 +29,32 @@ def merge_excel_sheets(excel_file_path, sheet_names=None, output_file='merged_da
         sheet_names: List of sheet names to merge (e.g., ['Batch1', 'Batch2', 'Batch3'])
                     If None, merges all sheets
         output_file: Output CSV filename
+        verbose: Also print first rows, data info and missing values
+                 (each is a full pass over the merged data)
+        usecols: Only read these columns (e.g. ['type', 'size', 'quantity'])
+        dtype: Column types to parse into directly (e.g. {'size': 'string', 'type': 'category'})
     
     Returns:
         Merged DataFrame
     """
-    # Read Excel file
-    excel_file = pd.ExcelFile(excel_file_path)
+    # Read all requested sheets in one call so the workbook is opened and
+    # parsed once (returns {sheet_name: DataFrame})
+    sheets = pd.read_excel(
+        excel_file_path,
+        sheet_name=sheet_names or None,
+        engine=get_excel_engine(),
+        usecols=usecols,
+        dtype=dtype
+    )
     
-    # Get sheet names if not provided
     if sheet_names is None:
-        sheet_names = excel_file.sheet_names
-        print(f"Found {len(sheet_names)} sheets: {sheet_names}")
+        print(f"Found {len(sheets)} sheets: {list(sheets)}")
     
-    # Read and combine all sheets
+    # Combine all sheets
     all_dataframes = []
     
-    for sheet_name in sheet_names:
+    for sheet_name, df in sheets.items():
         print(f"\nReading sheet: {sheet_name}")
-        df = pd.read_excel(excel_file_path, sheet_name=sheet_name)
         
         # Add sheet name as batch identifier if not present
         if 'batch' not in df.columns.str.lower():
@@ -51,20 +73,22 @@ def merge_excel_sheets(excel_file_path, sheet_names=None, output_file='merged_da
     print(f"   Total columns: {len(merged_df.columns)}")
     print(f"\nColumns: {merged_df.columns.tolist()}")
     
-    # Display first few rows
-    print(f"\nFirst 5 rows:")
-    print(merged_df.head())
-    
-    # Display data types and missing values
-    print(f"\nData Info:")
-    print(merged_df.info())
-    
-    print(f"\nMissing values:")
-    print(merged_df.isnull().sum())
+    if verbose:
+        # Display first few rows
+        print(f"\nFirst 5 rows:")
+        print(merged_df.head())
+        
+        # Display data types and missing values
+        print(f"\nData Info:")
+        print(merged_df.info())
+        
+        print(f"\nMissing values:")
+        print(merged_df.isnull().sum())
     
-    # Save to CSV
+    # Save to CSV (1 MiB write buffer, serialized in batches of rows)
     if output_file:
-        merged_df.to_csv(output_file, index=False)
+        with open(output_file, 'w', buffering=1 << 20, newline='') as f:
+            merged_df.to_csv(f, index=False, chunksize=50_000)
         print(f"\n✅ Saved merged data to: {output_file}")
     
     return merged_df
@@ -82,11 +106,15 @@ uploaded = files.upload()
 # Get the filename
 excel_filename = list(uploaded.keys())[0]
 
+# Optional: faster parsing with less memory
+# !pip install python-calamine
+
 # Merge all sheets (or specify sheet names)
 merged_data = merge_excel_sheets(
     excel_filename,
     sheet_names=['Batch1', 'Batch2', 'Batch3'],  # Or None to merge all
-    output_file='merged_batches.csv'
+    output_file='merged_batches.csv',
+    verbose=True  # Print preview, data info and missing values
 )
 
 # Now you can use merged_data for training
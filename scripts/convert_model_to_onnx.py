@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Convert Model Script - Exports the pre-trained .pkl model to ONNX
+
+Run this once after uploading a new models/uniform_forecast.pkl. run_forecast.py
+prefers the .onnx file (via onnxruntime) when it is present and was exported
+from the current .pkl (matched by SHA-256), and falls back to joblib otherwise.
+
+The trees are written as a float64 TreeEnsemble (ai.onnx.ml opset 5) so ONNX
+Runtime returns the same predictions as scikit-learn. skl2onnx only emits
+float32 leaf weights for forest regressors, which can land just under an
+integer (1.9999995) and make the forecast truncate one lower.
+
+Requires: pip install onnx onnxruntime
+"""
+
+import sys
+import os
+import json
+import joblib
+import numpy as np
+from onnx import TensorProto, helper, numpy_helper
+
+from run_forecast import MODEL_PATH, ONNX_MODEL_PATH, file_sha256
+
+# TreeEnsemble enums (see the ai.onnx.ml TreeEnsemble operator spec)
+BRANCH_LEQ = 0
+AGGREGATE_AVERAGE = 0
+
+def get_trees(model):
+    """Fitted sklearn.tree Tree objects of a single-output tree regressor / forest"""
+    estimators = getattr(model, 'estimators_', [model])
+    if getattr(model, 'n_outputs_', 1) != 1 or not all(hasattr(e, 'tree_') for e in estimators):
+        raise ValueError(
+            f"Only single-output tree regressors (e.g. RandomForestRegressor) can be converted, got {type(model).__name__}"
+        )
+    return [e.tree_ for e in estimators]
+
+def build_tree_ensemble(trees):
+    """TreeEnsemble node attributes that average the given trees in float64"""
+    attrs = {
+        'tree_roots': [], 'nodes_featureids': [], 'nodes_splits': [],
+        'nodes_truenodeids': [], 'nodes_trueleafs': [],
+        'nodes_falsenodeids': [], 'nodes_falseleafs': [],
+        'nodes_missing_value_tracks_true': [], 'leaf_weights': [],
+    }
+    
+    for tree in trees:
+        is_leaf = tree.children_left == -1
+        first_node = len(attrs['nodes_featureids'])
+        first_leaf = len(attrs['leaf_weights'])
+        
+        # sklearn numbers split and leaf nodes together - ONNX keeps them in
+        # separate arrays, so map each sklearn node to its position in its array
+        position = np.empty(tree.node_count, dtype=np.int64)
+        position[~is_leaf] = first_node + np.arange((~is_leaf).sum())
+        position[is_leaf] = first_leaf + np.arange(is_leaf.sum())
+        attrs['leaf_weights'].extend(tree.value[is_leaf, 0, 0].tolist())
+        attrs['tree_roots'].append(first_node)
+        
+        if is_leaf[0]:
+            # Single-leaf tree: one node with both branches on the same leaf
+            attrs['nodes_featureids'].append(0)
+            attrs['nodes_splits'].append(0.0)
+            attrs['nodes_missing_value_tracks_true'].append(0)
+            for side in ('true', 'false'):
+                attrs[f'nodes_{side}nodeids'].append(first_leaf)
+                attrs[f'nodes_{side}leafs'].append(1)
+            continue
+        
+        splits = np.flatnonzero(~is_leaf)
+        missing_left = getattr(tree, 'missing_go_to_left', np.zeros(tree.node_count, dtype=np.uint8))
+        attrs['nodes_featureids'].extend(tree.feature[splits].tolist())
+        attrs['nodes_splits'].extend(tree.threshold[splits].tolist())
+        attrs['nodes_missing_value_tracks_true'].extend(missing_left[splits].astype(int).tolist())
+        # sklearn goes left when x <= threshold, i.e. left is the true branch
+        for side, children in (('true', tree.children_left), ('false', tree.children_right)):
+            child = children[splits]
+            attrs[f'nodes_{side}nodeids'].extend(position[child].tolist())
+            attrs[f'nodes_{side}leafs'].extend(is_leaf[child].astype(int).tolist())
+    
+    n_nodes = len(attrs['nodes_featureids'])
+    n_leaves = len(attrs['leaf_weights'])
+    attrs['nodes_splits'] = numpy_helper.from_array(np.array(attrs['nodes_splits'], dtype=np.float64))
+    attrs['leaf_weights'] = numpy_helper.from_array(np.array(attrs['leaf_weights'], dtype=np.float64))
+    attrs['nodes_modes'] = numpy_helper.from_array(np.full(n_nodes, BRANCH_LEQ, dtype=np.uint8))
+    attrs['leaf_targetids'] = [0] * n_leaves
+    return attrs
+
+def convert_model(model_path=MODEL_PATH, onnx_path=ONNX_MODEL_PATH):
+    """Convert a joblib .pkl model to ONNX, keeping its feature names as metadata"""
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Model file not found: {model_path}")
+    
+    model = joblib.load(model_path)
+    n_features = model.n_features_in_
+    
+    node = helper.make_node(
+        'TreeEnsemble', ['input'], ['variable'], domain='ai.onnx.ml',
+        n_targets=1, aggregate_function=AGGREGATE_AVERAGE, post_transform=0,
+        **build_tree_ensemble(get_trees(model))
+    )
+    graph = helper.make_graph(
+        [node], type(model).__name__,
+        [helper.make_tensor_value_info('input', TensorProto.DOUBLE, [None, n_features])],
+        [helper.make_tensor_value_info('variable', TensorProto.DOUBLE, [None, 1])]
+    )
+    onnx_model = helper.make_model(
+        graph, ir_version=10,
+        opset_imports=[helper.make_opsetid('', 21), helper.make_opsetid('ai.onnx.ml', 5)]
+    )
+    
+    # ONNX graphs don't carry feature_names_in_, which run_forecast.py needs to
+    # line up the one-hot columns - store them in the model metadata
+    if hasattr(model, 'feature_names_in_'):
+        meta = onnx_model.metadata_props.add()
+        meta.key = 'feature_names'
+        meta.value = json.dumps([str(name) for name in model.feature_names_in_])
+    
+    # run_forecast.py only uses the export while the .pkl still has this hash
+    meta = onnx_model.metadata_props.add()
+    meta.key = 'source_sha256'
+    meta.value = file_sha256(model_path)
+    
+    tmp_path = f"{onnx_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(onnx_model.SerializeToString())
+    os.replace(tmp_path, onnx_path)
+    
+    print(f"✅ Converted {type(model).__name__} ({n_features} features) to: {onnx_path}")
+    return onnx_path
+
+def main():
+    """Main function - converts MODEL_PATH (or the given .pkl path) to ONNX"""
+    model_path = sys.argv[1] if len(sys.argv) > 1 else MODEL_PATH
+    onnx_path = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(model_path)[0] + '.onnx'
+    
+    try:
+        convert_model(model_path, onnx_path)
+    except Exception as e:
+        print(f"❌ Conversion failed: {e}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
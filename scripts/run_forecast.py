@@ -9,11 +9,29 @@ It loads a .pkl model file and generates recommendations based on historical dat
 import sys
 import json
 import os
-import joblib
-import pandas as pd
-import numpy as np
+import functools
+import hashlib
 from pathlib import Path
 
+# orjson is optional - much faster parse/serialize of the stdin/stdout payloads
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Heavy dependencies - imported by load_dependencies() on first real forecast
+# when run as a script, so empty requests skip the pandas import entirely
+joblib = pd = np = None
+
+def load_dependencies():
+    """Import joblib, pandas and numpy into module globals (once)"""
+    global joblib, pd, np
+    if pd is not None:
+        return
+    import joblib
+    import pandas as pd
+    import numpy as np
+
 # Model file path - use environment variable if provided, otherwise relative to script
 MODEL_PATH = os.environ.get('MODEL_PATH') or os.path.join(
     os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 
@@ -21,57 +39,212 @@ MODEL_PATH = os.environ.get('MODEL_PATH') or os.path.join(
     'uniform_forecast.pkl'
 )
 
+# ONNX export of the model (see convert_model_to_onnx.py) - used instead of
+# the .pkl when onnxruntime is installed and the export is up to date
+ONNX_MODEL_PATH = os.environ.get('ONNX_MODEL_PATH') or os.path.splitext(MODEL_PATH)[0] + '.onnx'
+
+# Verbose diagnostics on stderr (Node only surfaces them in its logs)
+DEBUG = os.environ.get('FORECAST_DEBUG', '').lower() in ('1', 'true', 'yes')
+
+# Cloth size variations -> standard format (matching Colab)
+CLOTH_SIZE_MAP = {
+    'XXS': 'XXS', 'XS': 'XS', 'S': 'S', 'M': 'M', 'L': 'L',
+    'XL': 'XL', 'XXL': 'XXL', 'XXXL': 'XXXL',
+    '2XL': 'XXL', '3XL': 'XXXL', '4XL': '4XL', '5XL': '5XL'
+}
+
+# Category -> numeric code (see encode_category)
+CATEGORY_MAP = {
+    'Uniform No 3': 0,
+    'Uniform No 4': 1,
+    'T-Shirt': 2,
+    'T Shirt': 2,
+    'TShirt': 2,
+    'Others': -1
+}
+
+# Type -> numeric code (see encode_type)
+_TYPE_INDEX = {t: i for i, t in enumerate([
+    # Primary types for forecasting (with sizes)
+    'BAJU_NO_3_LELAKI',      # 0
+    'BAJU_NO_3_PEREMPUAN',   # 1
+    'BAJU_NO_4',             # 2
+    'BOOT',                  # 3
+    'PVC Shoes',             # 4 (for future use)
+    # Other types (for compatibility)
+    'Cloth No 3', 'Cloth No 4', 'Trousers No 3', 'Trousers No 4',
+    'Hat', 'Beret', 'Shoes', 'Belt', 'Socks', 'Shirt', 'Jacket', 'BERET'
+])}
+
+# Cloth size -> numeric code (see encode_size)
+SIZE_MAP = {
+    'XS': 0, 'S': 1, 'M': 2, 'L': 3, 'XL': 4, '2XL': 5, '3XL': 6,
+    'XXL': 7, 'XXXL': 8, '4XL': 9, '5XL': 10
+}
+
+# int16 range for bulk size codes - anything outside is encoded as -1
+_SIZE_CODE_MIN = -32768
+_SIZE_CODE_MAX = 32767
+
+# Numeric size encoder picked by _get_numeric_size_kernel (numba JIT if installed)
+_NUMERIC_SIZE_KERNEL = None
+
+# Model cached by get_model, with the _model_files_key it was loaded for
+_MODEL = None
+_MODEL_KEY = None
+
+class OnnxForecastModel:
+    """ONNX Runtime session exposing the predict / feature_names_in_ interface used here"""
+    
+    def __init__(self, session):
+        self.session = session
+        self.input_name = session.get_inputs()[0].name
+        
+        metadata = session.get_modelmeta().custom_metadata_map
+        if 'feature_names' in metadata:
+            self.feature_names_in_ = np.array(json.loads(metadata['feature_names']), dtype=object)
+    
+    def predict(self, X):
+        # Graph input is float64 (see convert_model_to_onnx.py) so predictions
+        # match the scikit-learn model exactly
+        return self.session.run(None, {self.input_name: np.asarray(X, dtype=np.float64)})[0].ravel()
+
+def file_sha256(path):
+    """SHA-256 hex digest of a file, read in 1 MiB blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _load_onnx_model():
+    """Load the ONNX export if onnxruntime is installed and it was exported from the current MODEL_PATH"""
+    if not os.path.exists(ONNX_MODEL_PATH):
+        return None
+    try:
+        import onnxruntime
+    except ImportError:
+        return None
+    
+    try:
+        session = onnxruntime.InferenceSession(ONNX_MODEL_PATH, providers=['CPUExecutionProvider'])
+    except Exception as e:
+        print(f"Warning: Could not load ONNX model {ONNX_MODEL_PATH}: {e}", file=sys.stderr)
+        return None
+    
+    # mtimes don't say which .pkl an export came from - compare content hashes
+    source_sha256 = session.get_modelmeta().custom_metadata_map.get('source_sha256')
+    if source_sha256 != file_sha256(MODEL_PATH):
+        if DEBUG:
+            print(f"ONNX model {ONNX_MODEL_PATH} is stale, using {MODEL_PATH}", file=sys.stderr)
+        return None
+    return OnnxForecastModel(session)
+
 def load_model():
-    """Load pre-trained ML model from .pkl file"""
+    """Load the model - the ONNX export if it is usable (see _load_onnx_model), else the .pkl via joblib"""
     if not os.path.exists(MODEL_PATH):
         raise FileNotFoundError(f"Model file not found: {MODEL_PATH}")
     
-    model = joblib.load(MODEL_PATH)
+    model = _load_onnx_model()
+    if model is None:
+        model = joblib.load(MODEL_PATH)
+    get_feature_plan(model)
     return model
 
+def _file_key(path):
+    """Cheap change detector for a file, or None if it doesn't exist
+    
+    ctime is in the key because cp -p / rsync -t restore mtime but can't
+    restore ctime, and the inode changes when a file is replaced.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns, st.st_ctime_ns)
+
+def _model_files_key():
+    """What load_model's result depends on - the .pkl and its ONNX export"""
+    return (_file_key(MODEL_PATH), _file_key(ONNX_MODEL_PATH))
+
+def get_model():
+    """Return the loaded model, reloading only when the .pkl or .onnx file changes"""
+    global _MODEL, _MODEL_KEY
+    if not os.path.exists(MODEL_PATH):
+        raise FileNotFoundError(f"Model file not found: {MODEL_PATH}")
+    
+    key = _model_files_key()
+    if _MODEL is None or key != _MODEL_KEY:
+        _MODEL = load_model()
+        _MODEL_KEY = key
+        if DEBUG:
+            print(f"Model loaded: {type(_MODEL).__name__}", file=sys.stderr)
+    return _MODEL
+
+def get_feature_names(model):
+    """Feature names the model was trained with, or None if it doesn't store them"""
+    try:
+        if hasattr(model, 'feature_names_in_'):
+            return model.feature_names_in_
+        elif hasattr(model, 'get_feature_names_out'):
+            return model.get_feature_names_out()
+    except:
+        pass
+    return None
+
+@functools.lru_cache(maxsize=4)
+def _build_plan(feature_tuple):
+    """
+    Build the one-hot fill plan for a model's feature names
+    
+    Returns (type_lookup, size_lookup, n_features). Each lookup is
+    (categories, feature_columns), where feature_columns[i] is the X column
+    of categories[i]. Cached on the feature names, so repeated forecasts with
+    the same model skip this setup entirely.
+    """
+    feat_index = {name: i for i, name in enumerate(feature_tuple)}
+    lookups = []
+    for column in ('uniform_type_gendered', 'size'):
+        prefix = f"{column}_"
+        names = [name for name in feature_tuple if name.startswith(prefix)]
+        lookups.append((
+            pd.Index([name[len(prefix):] for name in names]),
+            np.array([feat_index[name] for name in names], dtype=np.intp)
+        ))
+    type_lookup, size_lookup = lookups
+    return type_lookup, size_lookup, len(feature_tuple)
+
+def get_feature_plan(model):
+    """One-hot fill plan for the model (None if it has no feature names)"""
+    feature_names = get_feature_names(model)
+    if feature_names is None:
+        return None
+    return _build_plan(tuple(feature_names))
+
 def encode_category(category):
     """Encode category to numeric"""
-    category_map = {
-        'Uniform No 3': 0,
-        'Uniform No 4': 1,
-        'T-Shirt': 2,
-        'T Shirt': 2,
-        'TShirt': 2,
-        'Others': -1
-    }
-    return category_map.get(category, -1)
+    return CATEGORY_MAP.get(category, -1)
+
+def encode_category_series(categories):
+    """Vectorized encode_category for a whole Series (int8, -1 for unknown)"""
+    return categories.map(CATEGORY_MAP).fillna(-1).astype(np.int8)
 
 def encode_type(type_str):
     """Encode type to numeric - prioritizing forecastable items"""
-    # Primary types for forecasting (with sizes)
-    type_list = [
-        'BAJU_NO_3_LELAKI',      # 0
-        'BAJU_NO_3_PEREMPUAN',   # 1
-        'BAJU_NO_4',             # 2
-        'BOOT',                  # 3
-        'PVC Shoes',             # 4 (for future use)
-        # Other types (for compatibility)
-        'Cloth No 3', 'Cloth No 4', 'Trousers No 3', 'Trousers No 4',
-        'Hat', 'Beret', 'Shoes', 'Belt', 'Socks', 'Shirt', 'Jacket', 'BERET'
-    ]
-    try:
-        return type_list.index(type_str)
-    except:
-        return len(type_list)  # Default encoding
+    return _TYPE_INDEX.get(type_str, len(_TYPE_INDEX))  # Default encoding
+
+def encode_type_series(types):
+    """Vectorized encode_type for a whole Series (int8)"""
+    return types.map(_TYPE_INDEX).fillna(len(_TYPE_INDEX)).astype(np.int8)
 
 def encode_size(size):
     """Encode size to numeric"""
     if pd.isna(size) or size is None or size == '':
         return -1
     
-    size_map = {
-        'XS': 0, 'S': 1, 'M': 2, 'L': 3, 'XL': 4, '2XL': 5, '3XL': 6,
-        'XXL': 7, 'XXXL': 8, '4XL': 9, '5XL': 10
-    }
-    
     # Try direct mapping first
-    if size in size_map:
-        return size_map[size]
+    if size in SIZE_MAP:
+        return SIZE_MAP[size]
     
     # Try numeric sizes (for shoes, berets, etc.)
     try:
@@ -86,6 +259,83 @@ def encode_size(size):
     except:
         return -1
 
+def _encode_numeric_sizes(size_num):
+    """
+    encode_size numeric rules over a float64 array (NumPy fallback kernel)
+    
+    Codes that do not fit int16 become -1 (unknown) rather than wrapping on
+    the cast, e.g. 100000 would otherwise come out as -31072.
+    """
+    numeric_codes = np.select(
+        [(size_num >= 4) & (size_num <= 13), (size_num >= 6.5) & (size_num <= 8.0)],
+        [np.trunc(size_num) + 6, np.trunc(size_num * 4) + 5],
+        default=np.trunc(size_num)
+    )
+    in_range = (
+        np.isfinite(size_num)
+        & (numeric_codes >= _SIZE_CODE_MIN)
+        & (numeric_codes <= _SIZE_CODE_MAX)
+    )
+    return np.where(in_range, numeric_codes, -1).astype(np.int16)
+
+def _get_numeric_size_kernel():
+    """
+    Return the kernel used by encode_size_series for numeric sizes
+    
+    Numba is optional and only imported on first bulk encode, so the forecast
+    path does not pay for it. Without numba the NumPy kernel is used.
+    """
+    global _NUMERIC_SIZE_KERNEL
+    if _NUMERIC_SIZE_KERNEL is not None:
+        return _NUMERIC_SIZE_KERNEL
+    
+    try:
+        import numba
+    except ImportError:
+        _NUMERIC_SIZE_KERNEL = _encode_numeric_sizes
+        return _NUMERIC_SIZE_KERNEL
+    
+    @numba.njit(cache=True)
+    def _encode_numeric_sizes_jit(size_num):
+        out = np.empty(size_num.shape[0], dtype=np.int16)
+        for i in range(size_num.shape[0]):
+            x = size_num[i]
+            # Shoe sizes: 4-13 -> 10-19
+            if 4 <= x <= 13:
+                code = np.trunc(x) + 6
+            # Beret sizes: 6.5-8.0 -> 20-35
+            elif 6.5 <= x <= 8.0:
+                code = np.trunc(x * 4) + 5
+            else:
+                code = np.trunc(x)
+            # Same int16 guard as the NumPy kernel (NaN/inf fail it too)
+            if _SIZE_CODE_MIN <= code <= _SIZE_CODE_MAX:
+                out[i] = int(code)
+            else:
+                out[i] = -1
+        return out
+    
+    _NUMERIC_SIZE_KERNEL = _encode_numeric_sizes_jit
+    return _NUMERIC_SIZE_KERNEL
+
+def encode_size_series(sizes):
+    """
+    Vectorized encode_size for a whole Series
+    
+    Same rules as encode_size: string sizes go through SIZE_MAP, everything
+    else through pd.to_numeric (unparseable -> NaN -> -1) and the numeric
+    kernel, instead of a try/except per element. Returns int16 (numeric
+    fallback codes can exceed int8); unlike encode_size, codes outside the
+    int16 range are returned as -1 instead of the raw number.
+    """
+    mapped = sizes.map(SIZE_MAP).to_numpy(dtype=np.float64)
+    # Numba does not unwrap pandas objects - pass a plain float64 array
+    size_num = pd.to_numeric(sizes, errors='coerce').to_numpy(dtype=np.float64)
+    numeric_codes = _get_numeric_size_kernel()(size_num)
+    
+    encoded = np.where(np.isnan(mapped), numeric_codes, mapped)
+    return pd.Series(encoded.astype(np.int16), index=sizes.index)
+
 def normalize_cloth_size(size):
     """Normalize cloth sizes to standard format (matching Colab)"""
     if pd.isna(size) or size is None:
@@ -93,14 +343,7 @@ def normalize_cloth_size(size):
     
     size_str = str(size).strip().upper()
     
-    # Handle variations
-    size_map = {
-        'XXS': 'XXS', 'XS': 'XS', 'S': 'S', 'M': 'M', 'L': 'L',
-        'XL': 'XL', 'XXL': 'XXL', 'XXXL': 'XXXL',
-        '2XL': 'XXL', '3XL': 'XXXL', '4XL': '4XL', '5XL': '5XL'
-    }
-    
-    return size_map.get(size_str, size_str)
+    return CLOTH_SIZE_MAP.get(size_str, size_str)
 
 def prepare_features(historical_data):
     """
@@ -127,34 +370,41 @@ def prepare_features(historical_data):
         raise ValueError("historical_data must contain 'size' column")
     
     # Normalize sizes based on uniform type (matching Colab logic)
-    df['size_normalized'] = df['size'].copy()
+    # Branches are selected with boolean masks so each one runs as a single
+    # column-wide operation instead of a Python loop over rows
+    utype = df['uniform_type_gendered'].astype(str).str.upper()
+    baju_mask = utype.str.contains('BAJU', regex=False)
+    numeric_mask = utype.str.contains('BOOT|BERET', regex=True) & ~baju_mask
+    other_mask = ~(baju_mask | numeric_mask)
     
-    for idx, row in df.iterrows():
-        uniform_type = str(row['uniform_type_gendered']).upper()
-        original_size = row['size']
-        
-        # For BAJU types: normalize cloth sizes
-        if 'BAJU' in uniform_type:
-            df.at[idx, 'size_normalized'] = normalize_cloth_size(original_size)
-        # For BOOT/BERET: keep as numeric (convert to float)
-        elif any(x in uniform_type for x in ['BOOT', 'BERET']):
-            try:
-                df.at[idx, 'size_normalized'] = float(original_size)
-            except:
-                df.at[idx, 'size_normalized'] = None
-        # For others: keep as string
-        else:
-            df.at[idx, 'size_normalized'] = str(original_size)
+    # Built as a local array and attached once at the end, so the frame is
+    # not copied for an intermediate 'size_normalized' column
+    sizes = df['size']
+    size_normalized = np.empty(len(df), dtype=object)
+    
+    # For BAJU types: normalize cloth sizes (see normalize_cloth_size)
+    if baju_mask.any():
+        baju_sizes = sizes[baju_mask]
+        original_upper = baju_sizes.astype(str).str.strip().str.upper().where(baju_sizes.notna())
+        size_normalized[baju_mask.to_numpy()] = original_upper.map(CLOTH_SIZE_MAP).fillna(original_upper).to_numpy()
+    # For BOOT/BERET: keep as numeric (convert to float, unparseable sizes become NaN)
+    # float64 explicitly - to_numeric returns int64 for all-integer input, and
+    # '7' must become '7.0' to match the model's size_7.0 column
+    if numeric_mask.any():
+        size_normalized[numeric_mask.to_numpy()] = pd.to_numeric(sizes[numeric_mask], errors='coerce').to_numpy(dtype=np.float64)
+    # For others: keep as string (a null size becomes 'None', like str(None))
+    if other_mask.any():
+        other_sizes = sizes[other_mask].to_numpy(dtype=object)
+        size_normalized[other_mask.to_numpy()] = np.where(pd.isna(other_sizes), 'None', other_sizes.astype(str))
     
     # Drop rows with null sizes (matching Colab: df_predict = df_predict[df_predict['size'].notna()])
-    df = df[df['size_normalized'].notna()].copy()
+    valid = ~pd.isna(size_normalized)
     
-    if len(df) == 0:
+    if not valid.any():
         raise ValueError("No valid data after filtering null sizes")
     
-    # Convert size_normalized back to string for one-hot encoding
-    # (pd.get_dummies works with strings/categories)
-    df['size'] = df['size_normalized'].astype(str)
+    # Convert normalized sizes back to string for one-hot encoding
+    df = df.loc[valid].assign(size=size_normalized[valid].astype(str))
     
     return df
 
@@ -165,9 +415,6 @@ def predict_demand(model, input_df):
     Colab model expects one-hot encoded features:
     - uniform_type_gendered_BAJU_NO_3_LELAKI, uniform_type_gendered_BAJU_NO_3_PEREMPUAN, etc.
     - size_L, size_M, size_S, etc. (for cloth) or size_3.0, size_3.5, etc. (for BOOT)
-    """
-    """
-    Run predictions using pre-trained model
     
     Args:
         model: Loaded ML model
@@ -180,141 +427,185 @@ def predict_demand(model, input_df):
     # Colab does: X = size_type_demand[['uniform_type_gendered', 'size']]
     # Then: X_encoded = pd.get_dummies(X, columns=['uniform_type_gendered', 'size'])
     
-    # Create feature DataFrame with uniform_type_gendered and size (matching Colab exactly)
-    # Colab: X = size_type_demand[['uniform_type_gendered', 'size']]
-    X_for_encoding = input_df[['uniform_type_gendered', 'size']].copy()
-    
-    # One-hot encode (matching Colab: pd.get_dummies)
-    X_encoded = pd.get_dummies(X_for_encoding, columns=['uniform_type_gendered', 'size'])
-    
-    print(f"One-hot encoded features: {list(X_encoded.columns)[:15]}...", file=sys.stderr)
-    print(f"Total features: {len(X_encoded.columns)}", file=sys.stderr)
-    
-    # Try to get feature names from model (if available)
-    expected_features = None
-    try:
-        if hasattr(model, 'feature_names_in_'):
-            expected_features = model.feature_names_in_
-            print(f"Model expects {len(expected_features)} features: {list(expected_features)[:10]}...", file=sys.stderr)
-        elif hasattr(model, 'get_feature_names_out'):
-            expected_features = model.get_feature_names_out()
-            print(f"Model expects {len(expected_features)} features: {list(expected_features)[:10]}...", file=sys.stderr)
-    except:
-        pass
+    plan = get_feature_plan(model)
     
-    # Match features to model expectations
-    if expected_features is not None:
-        # Model has feature names - align our one-hot encoded features
-        available_features = [f for f in expected_features if f in X_encoded.columns]
-        missing_features = [f for f in expected_features if f not in X_encoded.columns]
-        
-        if missing_features:
-            print(f"Warning: Missing {len(missing_features)} features. Adding zeros.", file=sys.stderr)
-            print(f"Missing: {missing_features[:5]}...", file=sys.stderr)
+    if plan is not None:
+        # Model has feature names - only 2 columns per row are non-zero, so
+        # scatter them straight into the model's column order instead of
+        # materializing the get_dummies frame and copying it column by column
+        type_lookup, size_lookup, n_features = plan
+        X = np.zeros((len(input_df), n_features), dtype=np.float32)
+        rows = np.arange(len(input_df))
         
-        # Create feature matrix matching model's expected order
-        X = np.zeros((len(X_encoded), len(expected_features)))
-        for i, feat in enumerate(expected_features):
-            if feat in X_encoded.columns:
-                X[:, i] = X_encoded[feat].values
-            # Missing features remain as 0 (default for one-hot encoding)
+        valid_counts = []
+        for column, (categories, feature_columns) in (('uniform_type_gendered', type_lookup), ('size', size_lookup)):
+            # Category codes against the model's canonical categories index
+            # straight into X (-1 for values the model never saw)
+            codes = categories.get_indexer(input_df[column].astype(str))
+            valid = codes >= 0
+            X[rows[valid], feature_columns[codes[valid]]] = 1.0
+            valid_counts.append(int(valid.sum()))
         
-        print(f"Feature matrix shape: {X.shape}, Model expects: ({len(X_encoded)}, {len(expected_features)})", file=sys.stderr)
+        unmatched = 2 * len(input_df) - sum(valid_counts)
+        if unmatched:
+            # Unknown type/size values stay as all-zero one-hot columns
+            print(f"Warning: {unmatched} type/size values not known to model. Leaving zeros.", file=sys.stderr)
+        if DEBUG:
+            print(f"Model expects {n_features} features: {list(get_feature_names(model))[:10]}...", file=sys.stderr)
+            print(f"Feature matrix shape: {X.shape}", file=sys.stderr)
     else:
         # Model doesn't store feature names - use our one-hot encoded features as-is
-        X = X_encoded.values
-        print(f"Using one-hot encoded features directly. Shape: {X.shape}", file=sys.stderr)
-    
-    # Handle NaN values
-    X = np.nan_to_num(X, nan=0.0, posinf=0.0, neginf=0.0)
+        X_encoded = pd.get_dummies(input_df[['uniform_type_gendered', 'size']], columns=['uniform_type_gendered', 'size'])
+        X = np.nan_to_num(X_encoded.values.astype(float), nan=0.0, posinf=0.0, neginf=0.0)
+        if DEBUG:
+            print(f"Using one-hot encoded features directly. Shape: {X.shape}", file=sys.stderr)
     
     try:
         predictions = model.predict(X)
-        print(f"Predictions generated: min={predictions.min():.2f}, max={predictions.max():.2f}, mean={predictions.mean():.2f}", file=sys.stderr)
+        if DEBUG:
+            print(f"Predictions generated: min={predictions.min():.2f}, max={predictions.max():.2f}, mean={predictions.mean():.2f}", file=sys.stderr)
     except Exception as e:
         print(f"Error: Model prediction failed: {e}", file=sys.stderr)
         import traceback
         traceback.print_exc(file=sys.stderr)
-        predictions = np.array([2] * len(input_df))  # Fallback to minimum stock
+        predictions = np.full(len(input_df), 2, dtype=np.int32)  # Fallback to minimum stock
+    
+    # Demand per type + size is at most a few thousand units - int16 is plenty.
+    # Clip while still float so an outlier can't wrap on the integer cast
+    # (a NaN prediction counts as no demand)
+    int16_max = np.iinfo(np.int16).max
     
     # Ensure predictions are non-negative integers
-    predictions = np.maximum(predictions, 0).astype(int)
+    predictions = np.clip(np.nan_to_num(predictions, nan=0.0), 0, int16_max).astype(np.int16)
     
-    # Calculate recommended stock (15% buffer)
-    input_df["predicted_demand"] = predictions
-    input_df["recommended_stock"] = (predictions * 1.15).round().astype(int)
+    # Calculate recommended stock (15% buffer), with a minimum stock level of 2 units
+    recommended_stock = np.clip(np.rint(predictions * 1.15), 2, int16_max).astype(np.int16)
     
-    # Ensure minimum stock level (at least 2 units)
-    input_df["recommended_stock"] = input_df["recommended_stock"].apply(
-        lambda x: max(int(x), 2)
-    )
+    input_df["predicted_demand"] = predictions
+    input_df["recommended_stock"] = recommended_stock
     
     return input_df
 
-def main():
-    """Main function - reads JSON from stdin, returns predictions as JSON"""
-    try:
-        # Read historical data from stdin
-        input_data = json.load(sys.stdin)
-        
-        if not isinstance(input_data, list):
-            raise ValueError("Input must be a JSON array of historical data records")
-        
-        if len(input_data) == 0:
-            # Return empty results
-            print(json.dumps({"success": True, "recommendations": []}))
-            return
-        
-        # Load model
-        model = load_model()
-        print(f"Model loaded: {type(model).__name__}", file=sys.stderr)
-        
-        # Prepare features
-        features_df = prepare_features(input_data)
+def _column_as_str(df, column_names, default):
+    """First of column_names present in df as a list of str (default if none are)"""
+    for name in column_names:
+        if name in df.columns:
+            return df[name].to_numpy(dtype=object).astype(str).tolist()
+    return [default] * len(df)
+
+def run_forecast(input_data):
+    """Run the full forecast pipeline for one request and return the output dict"""
+    if not isinstance(input_data, list):
+        raise ValueError("Input must be a JSON array of historical data records")
+    
+    if len(input_data) == 0:
+        # Return empty results
+        return {"success": True, "recommendations": []}
+    
+    load_dependencies()
+    
+    # Load model (cached across requests in --serve mode)
+    model = get_model()
+    
+    # Prepare features
+    features_df = prepare_features(input_data)
+    if DEBUG:
         print(f"Prepared features: {list(features_df.columns)}", file=sys.stderr)
         print(f"Number of records: {len(features_df)}", file=sys.stderr)
-        
-        # Run predictions
-        results_df = predict_demand(model, features_df)
-        
-        # Convert to list of dicts for JSON output
-        recommendations = []
-        for _, row in results_df.iterrows():
-            rec = {
-                "category": str(row.get('category', row.get('uniform_type', 'Others'))),
-                "type": str(row.get('type', row.get('uniform_type', 'Unknown'))),
-                "size": str(row['size']) if pd.notna(row.get('size')) else None,
-                "forecasted_demand": int(row['predicted_demand']),
-                "recommended_stock": int(row['recommended_stock'])
-            }
-            recommendations.append(rec)
-        
-        # Output results as JSON
-        output = {
-            "success": True,
-            "recommendations": recommendations,
-            "count": len(recommendations)
+    
+    # Run predictions
+    results_df = predict_demand(model, features_df)
+    
+    # Convert to list of dicts for JSON output - columns are pulled out as
+    # plain Python lists once, instead of building a Series per row
+    categories = _column_as_str(results_df, ('category', 'uniform_type'), 'Others')
+    types = _column_as_str(results_df, ('type', 'uniform_type'), 'Unknown')
+    sizes = results_df['size'].to_numpy(dtype=object)
+    sizes = np.where(pd.notna(sizes), sizes.astype(str), None).tolist()
+    forecasted = results_df['predicted_demand'].tolist()
+    recommended = results_df['recommended_stock'].tolist()
+    
+    recommendations = [
+        {
+            "category": category,
+            "type": type_,
+            "size": size,
+            "forecasted_demand": forecasted_demand,
+            "recommended_stock": recommended_stock
         }
-        
-        print(json.dumps(output))
-        
-    except FileNotFoundError as e:
-        error_output = {
+        for category, type_, size, forecasted_demand, recommended_stock
+        in zip(categories, types, sizes, forecasted, recommended)
+    ]
+    
+    # Output results as JSON
+    return {
+        "success": True,
+        "recommendations": recommendations,
+        "count": len(recommendations)
+    }
+
+def build_error_output(e):
+    """Convert an exception into the JSON error payload expected by Node"""
+    if isinstance(e, FileNotFoundError):
+        return {
             "success": False,
             "error": str(e),
             "message": "Model file not found. Please ensure the model is uploaded to models/uniform_forecast.pkl"
         }
-        print(json.dumps(error_output))
-        sys.exit(1)
+    return {
+        "success": False,
+        "error": str(e),
+        "message": f"Prediction error: {str(e)}"
+    }
+
+def read_json(data):
+    """Parse a JSON request from bytes"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def write_json(output):
+    """Write one JSON response line to stdout"""
+    if orjson is not None:
+        # orjson emits bytes directly and handles NumPy scalars natively
+        sys.stdout.buffer.write(orjson.dumps(output, option=orjson.OPT_SERIALIZE_NUMPY) + b"\n")
+    else:
+        sys.stdout.write(json.dumps(output) + "\n")
+    sys.stdout.flush()
+
+def serve():
+    """
+    Persistent worker mode (--serve)
+    
+    Reads one JSON array per line from stdin and writes one JSON response per
+    line to stdout, so the model is loaded once instead of on every forecast.
+    """
+    for line in sys.stdin.buffer:
+        if not line.strip():
+            continue
+        try:
+            output = run_forecast(read_json(line))
+        except Exception as e:
+            output = build_error_output(e)
+        write_json(output)
+
+def main():
+    """Main function - reads JSON from stdin, returns predictions as JSON"""
+    if '--serve' in sys.argv[1:]:
+        serve()
+        return
+    
+    try:
+        # Read historical data from stdin
+        input_data = read_json(sys.stdin.buffer.read())
+        write_json(run_forecast(input_data))
         
     except Exception as e:
-        error_output = {
-            "success": False,
-            "error": str(e),
-            "message": f"Prediction error: {str(e)}"
-        }
-        print(json.dumps(error_output))
+        write_json(build_error_output(e))
         sys.exit(1)
 
 if __name__ == "__main__":
     main()
+else:
+    # Imported as a module (e.g. for the encoders) - nothing to defer
+    load_dependencies()
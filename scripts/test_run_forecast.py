@@ -0,0 +1,201 @@
+"""
+Regression checks for run_forecast.py feature preparation
+
+Run with: python -m pytest scripts
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import run_forecast
+
+def test_integer_boot_beret_sizes_keep_float_format():
+    # Model columns are size_7.0, size_8.0, ... - int64 sizes would miss them
+    df = run_forecast.prepare_features([
+        {'type': 'BOOT', 'size': '7'},
+        {'type': 'BERET', 'size': '8'},
+        {'type': 'BOOT', 'size': 9},
+    ])
+    assert df['size'].tolist() == ['7.0', '8.0', '9.0']
+
+def test_unparseable_boot_size_is_dropped():
+    df = run_forecast.prepare_features([
+        {'type': 'BOOT', 'size': 'abc'},
+        {'type': 'BOOT', 'size': '7.5'},
+    ])
+    assert df['size'].tolist() == ['7.5']
+
+def test_cloth_sizes_are_normalized():
+    df = run_forecast.prepare_features([
+        {'type': 'BAJU_NO_4', 'size': ' m '},
+        {'type': 'BAJU_NO_3_LELAKI', 'size': '2XL'},
+        {'type': 'BAJU_NO_4', 'size': None},
+    ])
+    assert df['size'].tolist() == ['M', 'XXL']
+
+def test_other_null_size_matches_str_none():
+    df = run_forecast.prepare_features([
+        {'type': 'Hat', 'size': None},
+        {'type': 'Shirt', 'size': 'L'},
+    ])
+    assert df['size'].tolist() == ['None', 'L']
+
+def test_numeric_size_codes_outside_int16_are_unknown():
+    size_num = np.array([7.0, 32767.0, 100000.0, -40000.0, np.nan, np.inf])
+    codes = run_forecast._encode_numeric_sizes(size_num)
+    assert codes.dtype == np.int16
+    assert codes.tolist() == [13, 32767, -1, -1, -1, -1]
+
+def test_numba_size_kernel_matches_numpy():
+    pytest.importorskip('numba')
+    size_num = np.array([4.0, 6.5, 7.25, 8.0, 13.0, 14.9, -3.5, 32767.0, 1e20, -40000.0, np.nan, -np.inf])
+    kernel = run_forecast._get_numeric_size_kernel()
+    assert kernel is not run_forecast._encode_numeric_sizes
+    assert kernel(size_num).tolist() == run_forecast._encode_numeric_sizes(size_num).tolist()
+
+def test_encode_size_series_out_of_range_is_unknown():
+    codes = run_forecast.encode_size_series(pd.Series(['M', '7', '100000', 'abc', None], dtype=object))
+    assert codes.tolist() == [2, 13, -1, -1, -1]
+
+def _type_size_grid(feature_names):
+    """One row per uniform type x size one-hot pair the model was trained on"""
+    types = [i for i, name in enumerate(feature_names) if name.startswith('uniform_type_gendered_')]
+    sizes = [i for i, name in enumerate(feature_names) if name.startswith('size_')]
+    X = np.zeros((len(types) * len(sizes), len(feature_names)), dtype=np.float32)
+    for row, (t, s) in enumerate((t, s) for t in types for s in sizes):
+        X[row, [t, s]] = 1
+    return X
+
+def test_onnx_export_matches_sklearn(tmp_path, monkeypatch):
+    pytest.importorskip('onnx')
+    pytest.importorskip('onnxruntime')
+    import convert_model_to_onnx
+    
+    onnx_path = str(tmp_path / 'uniform_forecast.onnx')
+    convert_model_to_onnx.convert_model(run_forecast.MODEL_PATH, onnx_path)
+    monkeypatch.setattr(run_forecast, 'ONNX_MODEL_PATH', onnx_path)
+    onnx_model = run_forecast.load_model()
+    sklearn_model = run_forecast.joblib.load(run_forecast.MODEL_PATH)
+    assert isinstance(onnx_model, run_forecast.OnnxForecastModel)
+    assert list(onnx_model.feature_names_in_) == list(sklearn_model.feature_names_in_)
+    
+    X = _type_size_grid(list(sklearn_model.feature_names_in_))
+    expected = sklearn_model.predict(pd.DataFrame(X, columns=sklearn_model.feature_names_in_))
+    # Exact match - truncation to int turns any float32 drift into +-1 demand
+    assert onnx_model.predict(X).tolist() == expected.tolist()
+
+def test_stale_onnx_export_is_ignored(tmp_path, monkeypatch):
+    onnx = pytest.importorskip('onnx')
+    pytest.importorskip('onnxruntime')
+    import convert_model_to_onnx
+    
+    onnx_path = str(tmp_path / 'uniform_forecast.onnx')
+    convert_model_to_onnx.convert_model(run_forecast.MODEL_PATH, onnx_path)
+    exported = onnx.load(onnx_path)
+    for meta in exported.metadata_props:
+        if meta.key == 'source_sha256':
+            meta.value = '0' * 64
+    onnx.save(exported, onnx_path)
+    
+    monkeypatch.setattr(run_forecast, 'ONNX_MODEL_PATH', onnx_path)
+    assert run_forecast._load_onnx_model() is None
+
+class _RecordingModel:
+    """Stand-in model that keeps the feature matrix predict_demand builds"""
+    
+    def __init__(self, feature_names):
+        self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+        self.X = None
+    
+    def predict(self, X):
+        self.X = np.asarray(X)
+        return np.zeros(len(X))
+
+def test_feature_matrix_matches_get_dummies_alignment():
+    feature_names = list(run_forecast.joblib.load(run_forecast.MODEL_PATH).feature_names_in_)
+    types = [name[len('uniform_type_gendered_'):] for name in feature_names if name.startswith('uniform_type_gendered_')]
+    sizes = [name[len('size_'):] for name in feature_names if name.startswith('size_')]
+    grid = pd.DataFrame(
+        [(t, s) for t in types + ['UNKNOWN_TYPE'] for s in sizes + ['99.0', 'None']],
+        columns=['uniform_type_gendered', 'size']
+    )
+    
+    model = _RecordingModel(feature_names)
+    run_forecast.predict_demand(model, grid.copy())
+    
+    # Reference: the original get_dummies + per-column realignment
+    X_encoded = pd.get_dummies(grid, columns=['uniform_type_gendered', 'size'])
+    expected = np.zeros((len(grid), len(feature_names)))
+    for i, feat in enumerate(feature_names):
+        if feat in X_encoded.columns:
+            expected[:, i] = X_encoded[feat].values
+    
+    assert model.X.shape == expected.shape
+    assert np.array_equal(model.X, expected)
+
+def test_run_forecast_output_shape():
+    output = run_forecast.run_forecast([
+        {'type': 'BOOT', 'size': '7', 'category': 'Uniform No 3'},
+        {'type': 'BAJU_NO_3_PEREMPUAN', 'size': '8.5', 'category': 'Uniform No 3'},
+        {'type': 'Hat', 'size': None, 'category': 'Others'},
+        {'type': 'BAJU_NO_4', 'size': 'abc', 'category': 'Uniform No 4'},
+    ])
+    assert output == {
+        'success': True,
+        'recommendations': [
+            {'category': 'Uniform No 3', 'type': 'BOOT', 'size': '7.0', 'forecasted_demand': 10, 'recommended_stock': 12},
+            {'category': 'Uniform No 3', 'type': 'BAJU_NO_3_PEREMPUAN', 'size': '8.5', 'forecasted_demand': 2, 'recommended_stock': 2},
+            {'category': 'Others', 'type': 'Hat', 'size': 'None', 'forecasted_demand': 2, 'recommended_stock': 2},
+            {'category': 'Uniform No 4', 'type': 'BAJU_NO_4', 'size': 'ABC', 'forecasted_demand': 3, 'recommended_stock': 3},
+        ],
+        'count': 4,
+    }
+    # Plain Python ints, not NumPy scalars - json.dumps must accept them
+    assert all(type(rec['forecasted_demand']) is int and type(rec['recommended_stock']) is int
+               for rec in output['recommendations'])
+
+def test_get_model_reloads_when_onnx_export_appears(tmp_path, monkeypatch):
+    pytest.importorskip('onnx')
+    pytest.importorskip('onnxruntime')
+    import convert_model_to_onnx
+    
+    onnx_path = str(tmp_path / 'uniform_forecast.onnx')
+    monkeypatch.setattr(run_forecast, 'ONNX_MODEL_PATH', onnx_path)
+    monkeypatch.setattr(run_forecast, '_MODEL', None)
+    assert not isinstance(run_forecast.get_model(), run_forecast.OnnxForecastModel)
+    
+    # README order: new .pkl picked up first, converter run afterwards
+    convert_model_to_onnx.convert_model(run_forecast.MODEL_PATH, onnx_path)
+    assert isinstance(run_forecast.get_model(), run_forecast.OnnxForecastModel)
+
+def test_get_model_reloads_pkl_restored_with_same_mtime(tmp_path, monkeypatch):
+    model_path = tmp_path / 'uniform_forecast.pkl'
+    model_path.write_bytes(open(run_forecast.MODEL_PATH, 'rb').read())
+    monkeypatch.setattr(run_forecast, 'MODEL_PATH', str(model_path))
+    monkeypatch.setattr(run_forecast, 'ONNX_MODEL_PATH', str(tmp_path / 'missing.onnx'))
+    monkeypatch.setattr(run_forecast, '_MODEL', None)
+    first = run_forecast.get_model()
+    assert run_forecast.get_model() is first
+    
+    # Like cp -p: same mtime (and size), different file
+    st = os.stat(model_path)
+    restored = tmp_path / 'restored.pkl'
+    restored.write_bytes(model_path.read_bytes())
+    os.replace(restored, model_path)
+    os.utime(model_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert run_forecast.get_model() is not first
+
+def test_outlier_predictions_clip_instead_of_wrapping():
+    class OutlierModel(_RecordingModel):
+        def predict(self, X):
+            return np.array([2.0 ** 31, np.nan, np.inf, -5.0, 1.9, 40000.0, 99.6])
+    
+    model = OutlierModel(['uniform_type_gendered_BOOT', 'size_7.0'])
+    input_df = pd.DataFrame({'uniform_type_gendered': ['BOOT'] * 7, 'size': ['7.0'] * 7})
+    result = run_forecast.predict_demand(model, input_df)
+    assert result['predicted_demand'].tolist() == [32767, 0, 32767, 0, 1, 32767, 99]
+    assert result['recommended_stock'].tolist() == [32767, 2, 32767, 2, 2, 32767, 114]
+    assert result['predicted_demand'].dtype == np.int16
@@ -4,7 +4,7 @@
  * Service to interact with Python ML model for forecasting
  */
 
-import { spawn } from 'child_process';
+import { spawn, ChildProcessWithoutNullStreams } from 'child_process';
 import * as path from 'path';
 import * as fs from 'fs';
 
@@ -34,9 +34,19 @@ interface ForecastResult {
   message?: string;
 }
 
+interface PendingForecast {
+  resolve: (result: ForecastResult) => void;
+  timer: NodeJS.Timeout;
+}
+
+// How long a single forecast may wait on the worker before it is killed
+const FORECAST_TIMEOUT_MS = Number(process.env.ML_FORECAST_TIMEOUT_MS) || 120000;
+
 export class MLForecastService {
   private pythonScriptPath: string;
   private modelPath: string;
+  private worker: ChildProcessWithoutNullStreams | null = null;
+  private pending: PendingForecast[] = [];
 
   constructor() {
     // Path to Python script (relative to project root)
@@ -77,109 +87,24 @@ export class MLForecastService {
       };
     }
 
-    // Prepare data for Python script
+    // Send data to the persistent Python worker (one JSON line per request)
     const inputData = JSON.stringify(historicalData);
+    console.log(`📦 Input data size: ${inputData.length} bytes`);
 
-    // Use python3 or python depending on system
-    const pythonCommand = process.platform === 'win32' ? 'python' : 'python3';
-
-    // Return a promise that wraps the spawned Python process
-    return new Promise<ForecastResult>((resolve, reject) => {
+    return new Promise<ForecastResult>((resolve) => {
       try {
-        console.log(`🐍 Spawning Python: ${pythonCommand} ${this.pythonScriptPath}`);
-        console.log(`📦 Input data size: ${inputData.length} bytes`);
-        console.log(`📁 Model path: ${this.modelPath}`);
-        
-        const python = spawn(pythonCommand, [this.pythonScriptPath], {
-          env: {
-            ...process.env,
-            PYTHONUNBUFFERED: '1', // Ensure Python output is not buffered
-            MODEL_PATH: this.modelPath // Pass model path as environment variable
-          },
-          cwd: path.join(__dirname, '../..') // Set working directory to project root
-        });
-
-        let stdout = '';
-        let stderr = '';
-
-        python.stdout.on('data', (data: Buffer) => {
-          stdout += data.toString();
-        });
-
-        python.stderr.on('data', (data: Buffer) => {
-          stderr += data.toString();
-        });
-
-        python.on('error', (error) => {
-          console.error('ML Forecast Service spawn error:', error);
-          if ((error as any).code === 'ENOENT') {
-            return resolve({
-              success: false,
-              error: 'Python not found',
-              message: 'Python 3 is required but not found in PATH. Please install Python 3.'
-            });
-          }
-
-          return resolve({
+        const worker = this.getWorker();
+        const timer = setTimeout(() => {
+          console.error(`❌ Python worker timed out after ${FORECAST_TIMEOUT_MS}ms`);
+          worker.kill();
+          this.failWorker(worker, {
             success: false,
-            error: error.message || 'Unknown error',
+            error: `Forecast timed out after ${FORECAST_TIMEOUT_MS}ms`,
             message: 'Failed to run forecast prediction'
           });
-        });
-
-        python.on('close', (code) => {
-          if (stderr && !stderr.includes('Warning:')) {
-            console.warn('Python script stderr:', stderr);
-          }
-
-          if (code !== 0) {
-            console.error(`❌ Python script exited with code ${code}`);
-            console.error('Python stderr:', stderr);
-            console.error('Python stdout (partial):', stdout.substring(0, 500));
-            return resolve({
-              success: false,
-              error: `Python exited with code ${code}: ${stderr || 'No error message'}`,
-              message: 'Failed to run forecast prediction'
-            });
-          }
-
-          if (!stdout || stdout.trim().length === 0) {
-            console.error('❌ Python script returned empty output');
-            return resolve({
-              success: false,
-              error: 'Python script returned empty output',
-              message: 'Failed to get forecast results from Python script'
-            });
-          }
-
-          try {
-            const result: ForecastResult = JSON.parse(stdout);
-
-            if (!result.success) {
-              console.error('❌ Python script returned error:', result.error);
-              return resolve({
-                success: false,
-                error: result.error || 'Unknown error',
-                message: result.message || 'Failed to generate forecast'
-              });
-            }
-
-            console.log(`✅ ML Forecast Service: Generated ${result.recommendations?.length || 0} recommendations`);
-            return resolve(result);
-          } catch (error: any) {
-            console.error('❌ ML Forecast Service JSON parse error:', error);
-            console.error('Raw stdout:', stdout.substring(0, 1000));
-            return resolve({
-              success: false,
-              error: `Invalid response from Python script: ${error.message}`,
-              message: 'Failed to parse forecast results'
-            });
-          }
-        });
-
-        // Send data to Python via stdin
-        python.stdin.write(inputData);
-        python.stdin.end();
+        }, FORECAST_TIMEOUT_MS);
+        this.pending.push({ resolve, timer });
+        worker.stdin.write(inputData + '\n');
       } catch (error: any) {
         console.error('ML Forecast Service Error:', error);
         return resolve({
@@ -190,6 +115,154 @@ export class MLForecastService {
       }
     });
   }
+
+  /**
+   * Get the persistent Python worker, spawning it on first use
+   *
+   * The worker runs `run_forecast.py --serve`, loads the model once and then
+   * answers newline-delimited JSON requests in order, so each forecast no
+   * longer pays Python startup and model unpickling.
+   */
+  private getWorker(): ChildProcessWithoutNullStreams {
+    if (this.worker) {
+      return this.worker;
+    }
+
+    // Use python3 or python depending on system
+    const pythonCommand = process.platform === 'win32' ? 'python' : 'python3';
+
+    console.log(`🐍 Spawning Python worker: ${pythonCommand} ${this.pythonScriptPath} --serve`);
+    console.log(`📁 Model path: ${this.modelPath}`);
+
+    const worker = spawn(pythonCommand, [this.pythonScriptPath, '--serve'], {
+      env: {
+        ...process.env,
+        PYTHONUNBUFFERED: '1', // Ensure Python output is not buffered
+        MODEL_PATH: this.modelPath // Pass model path as environment variable
+      },
+      cwd: path.join(__dirname, '../..') // Set working directory to project root
+    });
+    this.worker = worker;
+
+    // Partial stdout line of this worker only - a killed worker's leftovers
+    // must never be joined with (or answer) a replacement worker's requests
+    let stdoutBuffer = '';
+
+    // Decode as a stream - orjson writes raw UTF-8, and decoding each chunk on
+    // its own would turn a character split across chunks into U+FFFD
+    worker.stdout.setEncoding('utf8');
+    worker.stderr.setEncoding('utf8');
+
+    worker.stdout.on('data', (data: string) => {
+      if (this.worker !== worker) {
+        return;
+      }
+      stdoutBuffer += data;
+
+      let newlineIndex: number;
+      while ((newlineIndex = stdoutBuffer.indexOf('\n')) !== -1) {
+        const line = stdoutBuffer.slice(0, newlineIndex);
+        stdoutBuffer = stdoutBuffer.slice(newlineIndex + 1);
+
+        if (line.trim().length === 0) {
+          continue;
+        }
+
+        const request = this.pending.shift();
+        if (request) {
+          clearTimeout(request.timer);
+          request.resolve(this.parseResult(line));
+        }
+      }
+    });
+
+    worker.stderr.on('data', (data: string) => {
+      const stderr = data.trim();
+      if (stderr && !stderr.includes('Warning:')) {
+        console.warn('Python worker stderr:', stderr);
+      }
+    });
+
+    worker.stdin.on('error', (error) => {
+      console.error('ML Forecast Service worker stdin error:', error);
+    });
+
+    worker.on('error', (error) => {
+      console.error('ML Forecast Service spawn error:', error);
+      if ((error as any).code === 'ENOENT') {
+        return this.failWorker(worker, {
+          success: false,
+          error: 'Python not found',
+          message: 'Python 3 is required but not found in PATH. Please install Python 3.'
+        });
+      }
+
+      return this.failWorker(worker, {
+        success: false,
+        error: error.message || 'Unknown error',
+        message: 'Failed to run forecast prediction'
+      });
+    });
+
+    worker.on('close', (code) => {
+      console.error(`❌ Python worker exited with code ${code}`);
+      this.failWorker(worker, {
+        success: false,
+        error: `Python exited with code ${code}`,
+        message: 'Failed to run forecast prediction'
+      });
+    });
+
+    return worker;
+  }
+
+  /**
+   * Drop a dead or hung worker and fail every request still waiting on it
+   *
+   * The next runForecast call spawns a fresh worker.
+   */
+  private failWorker(worker: ChildProcessWithoutNullStreams, result: ForecastResult): void {
+    if (this.worker !== worker) {
+      return;
+    }
+
+    this.worker = null;
+    const pending = this.pending;
+    this.pending = [];
+    pending.forEach((request) => {
+      clearTimeout(request.timer);
+      request.resolve(result);
+    });
+  }
+
+  /**
+   * Parse one JSON response line from the Python worker
+   */
+  private parseResult(line: string): ForecastResult {
+    try {
+      const result: ForecastResult = JSON.parse(line);
+
+      if (!result.success) {
+        console.error('❌ Python script returned error:', result.error);
+        return {
+          success: false,
+          error: result.error || 'Unknown error',
+          message: result.message || 'Failed to generate forecast'
+        };
+      }
+
+      console.log(`✅ ML Forecast Service: Generated ${result.recommendations?.length || 0} recommendations`);
+      return result;
+    } catch (error: any) {
+      console.error('❌ ML Forecast Service JSON parse error:', error);
+      console.error('Raw stdout:', line.substring(0, 1000));
+      return {
+        success: false,
+        error: `Invalid response from Python script: ${error.message}`,
+        message: 'Failed to parse forecast results'
+      };
+    }
+  }
 }
 
 // Export singleton instance